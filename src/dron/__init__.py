@@ -2,9 +2,10 @@
 from __future__ import annotations
 
 import argparse
-from collections import OrderedDict
+from datetime import datetime, timedelta
 from difflib import unified_diff
-from itertools import tee
+import hashlib
+import importlib.metadata
 import os
 from pathlib import Path
 from pprint import pprint
@@ -27,6 +28,7 @@ from .common import (
     VERIFY_UNITS,
     UnitState, State,
     ALWAYS,
+    DRON_CACHE_DIR,
 )
 from . import launchd
 from . import systemd
@@ -66,8 +68,11 @@ def write_unit(*, unit: Unit, body: Body, prefix: Path=DRON_UNITS_DIR) -> None:
     unit_file = prefix / unit
 
     logger.info(f'writing unit file: {unit_file}')
-    verify_unit(unit_name=unit_file.name, body=body)
-    unit_file.write_text(body)
+    # NOTE: not verifying here -- all units go through make_state, which verifies them in bulk
+    # write + rename is atomic, so systemd never gets to see a partially written unit
+    tmp_file = unit_file.with_name(unit_file.name + '.tmp')
+    tmp_file.write_text(body)
+    tmp_file.replace(unit_file)
 
 
 def _daemon_reload() -> None:
@@ -85,7 +90,7 @@ def managed_units(*, with_body: bool) -> State:
         yield from launchd.launchd_state(with_body=with_body)
 
 
-def make_state(jobs: Iterable[Job]) -> State:
+def make_state(jobs: Iterable[Job]) -> list[UnitState]:
     pre_units = []
     names: Set[Unit] = set()
     for j in jobs:
@@ -112,12 +117,14 @@ def make_state(jobs: Iterable[Job]) -> State:
 
     verify_units(pre_units)
 
-    for unit_file, body in pre_units:
-        yield UnitState(
+    return [
+        UnitState(
             unit_file=DRON_UNITS_DIR / unit_file,
             body=body,
             cmdline=None,  # ugh, a bit crap, but from this code path cmdline doesn't matter
         )
+        for unit_file, body in pre_units
+    ]
 
 
 # TODO bleh. too verbose..
@@ -155,24 +162,35 @@ Plan = Iterable[Action]
 
 def compute_plan(*, current: State, pending: State) -> Plan:
     # eh, I feel like i'm reinventing something already existing here...
-    currentd = OrderedDict((x.unit_file, unwrap(x.body)) for x in current)
-    pendingd = OrderedDict((x.unit_file, unwrap(x.body)) for x in pending)
-
-    units = [c for c in currentd if c not in pendingd] + list(pendingd.keys())
-    for u in units:
-        in_cur = u in currentd
-        in_pen = u in pendingd
-        if in_cur:
-            if in_pen:
-                # TODO not even sure I should emit it if bodies match??
-                yield Update(unit_file=u, old_body=currentd[u], new_body=pendingd[u])
-            else:
-                yield Delete(unit_file=u)
+    # NOTE: dicts preserve insertion order
+    currentd = {x.unit_file: unwrap(x.body) for x in current}
+    pendingd = {x.unit_file: unwrap(x.body) for x in pending}
+
+    for u in currentd:
+        if u not in pendingd:
+            yield Delete(unit_file=u)
+    for u, new_body in pendingd.items():
+        old_body = currentd.get(u)
+        if old_body is None:
+            yield Add(unit_file=u, body=new_body)
         else:
-            if in_pen:
-                yield Add(unit_file=u, body=pendingd[u])
-            else:
-                raise AssertionError("Can't happen")
+            # TODO not even sure I should emit it if bodies match??
+            # for now apply_state uses these to report unchanged units
+            yield Update(unit_file=u, old_body=old_body, new_body=new_body)
+
+
+def test_compute_plan() -> None:
+    def st(name: str, body: str) -> UnitState:
+        return UnitState(unit_file=Path(name), body=body, cmdline=None)
+
+    current = [st('a', '1'), st('b', '2'), st('c', '3')]
+    pending = [st('c', '3x'), st('d', '4'), st('a', '1')]
+    assert list(compute_plan(current=current, pending=pending)) == [
+        Delete(unit_file=Path('b')),
+        Update(unit_file=Path('c'), old_body='3', new_body='3x'),
+        Add(unit_file=Path('d'), body='4'),
+        Update(unit_file=Path('a'), old_body='1', new_body='1'),
+    ]
 
 
 # TODO it's not apply, more like 'compute' and also plan is more like a diff between states?
@@ -214,15 +232,15 @@ def apply_state(pending: State) -> None:
     updates: list[tuple[Update, Diff]] = []
 
     for u in _updates:
-        unit = a.unit
+        if u.old_body == u.new_body:
+            # most units don't change, no need to run the diff for them
+            nochange.append(u)
+            continue
         diff: Diff = list(unified_diff(
             u.old_body.splitlines(keepends=True),
             u.new_body.splitlines(keepends=True),
         ))
-        if len(diff) == 0:
-            nochange.append(u)
-        else:
-            updates.append((u, diff))
+        updates.append((u, diff))
 
     # TODO list unit names here?
     logger.info(f'no change: {len(nochange)}')
@@ -230,17 +248,21 @@ def apply_state(pending: State) -> None:
     logger.info(f'updating : {len(updates)}')
     logger.info(f'adding   : {len(adds)}')
 
-    for a in deletes:
-        if IS_SYSTEMD:
+    # NOTE: for systemd, batching units into as few systemctl calls as possible
+    # each call is a process spawn + dbus roundtrips + possibly an implicit daemon reload
+    if IS_SYSTEMD:
+        if len(deletes) > 0:
             # TODO stop timer first?
-            check_call(_systemctl('stop'   , a.unit))
-            check_call(_systemctl('disable', a.unit))
-        else:
+            check_call(_systemctl('stop'   , *(a.unit for a in deletes)))
+            check_call(_systemctl('disable', *(a.unit for a in deletes)))
+    else:
+        for a in deletes:
             launchd.launchctl_unload(unit=Path(a.unit).stem)
     for a in deletes:
         (DRON_UNITS_DIR / a.unit).unlink()
 
 
+    to_restart: list[Unit] = []
     for (u, diff) in updates:
         unit = u.unit
         unit_file = u.unit_file
@@ -251,45 +273,54 @@ def apply_state(pending: State) -> None:
         if IS_SYSTEMD:
             if unit.endswith('.service') and is_always_running(unit_file):
                 # persistent unit needs a restart to pick up change
-                _daemon_reload()
-                check_call(_systemctl('restart', unit))
+                to_restart.append(unit)
         else:
             launchd.launchctl_reload(unit=Path(unit).stem, unit_file=unit_file)
 
         if unit.endswith('.timer'):
-            _daemon_reload()
             # NOTE: need to be careful -- seems that job might trigger straightaway if it's on interval schedule
             # so if we change something unrelated (e.g. whitespace), it will start all jobs at the same time??
-            check_call(_systemctl('restart', u.unit))
+            to_restart.append(unit)
 
     for a in adds:
         logger.info(f'adding {a.unit_file}')
         # TODO when we add, assert that previous unit wasn't managed? otherwise we overwrite something
         write_unit(unit=a.unit, body=a.body)
 
-    # need to load units before starting the timers..
-    _daemon_reload()
-   
+    if len(deletes) + len(updates) + len(adds) > 0:
+        # single reload for everything: picks up removed files, and updated/new units before restarting/starting them
+        _daemon_reload()
+
+    if len(to_restart) > 0:
+        check_call(_systemctl('restart', *to_restart))
+
+    services_now: list[UnitFile] = []
+    services: list[UnitFile] = []
+    timers: list[UnitFile] = []
     for a in adds:
         unit_file = a.unit_file
         unit = unit_file.name
         logger.info(f'enabling {unit}')
         if unit.endswith('.service'):
-            # quiet here because it warns that "The unit files have no installation config"
-            # TODO maybe add [Install] section? dunno
-            maybe_now = []
             if is_always_running(unit_file):
-                maybe_now = ['--now']
-            check_call(_systemctl('enable', unit_file, '--quiet', *maybe_now))
+                services_now.append(unit_file)
+            else:
+                services.append(unit_file)
         elif unit.endswith('.timer'):
-            check_call(_systemctl('enable', unit_file, '--now'))
+            timers.append(unit_file)
         elif unit.endswith('.plist'):
             launchd.launchctl_load(unit_file=unit_file)
         else:
             raise AssertionError(a)
-
-    # TODO not sure if this reload is even necessary??
-    _daemon_reload()
+    # services go first, since timers need them to be present when they are started
+    # quiet here because it warns that "The unit files have no installation config"
+    # TODO maybe add [Install] section? dunno
+    if len(services_now) > 0:
+        check_call(_systemctl('enable', '--quiet', '--now', *services_now))
+    if len(services) > 0:
+        check_call(_systemctl('enable', '--quiet', *services))
+    if len(timers) > 0:
+        check_call(_systemctl('enable', '--now', *timers))
 
 
 def manage(state: State) -> None:
@@ -364,6 +395,57 @@ def jobs():
 Error = str
 # TODO perhaps, return Plan or error instead?
 
+
+# marker files for linter runs that passed before
+_LINT_CACHE = DRON_CACHE_DIR / 'lint'
+_DRON_SRC_DIR = Path(__file__).resolve().parent
+
+
+def _mypy_configs(cwd: Path) -> list[Path]:
+    # see https://mypy.readthedocs.io/en/stable/config_file.html
+    xdg_config = Path(os.environ.get('XDG_CONFIG_HOME', '~/.config')).expanduser()
+    return [
+        *(cwd / name for name in ['mypy.ini', '.mypy.ini', 'pyproject.toml', 'setup.cfg']),
+        xdg_config / 'mypy' / 'config',
+        Path('~/.config/mypy/config').expanduser(),
+        Path('~/.mypy.ini').expanduser(),
+    ]
+
+
+def _lint_key(linter: list[str], *, tabfile: Path, dtab_dir: Path, cwd: Path) -> str:
+    # linter result depends on the tabfile, anything it might import from drontab dir, dron itself, mypy and its config
+    h = hashlib.blake2b(digest_size=16)
+    # tabfile path is often temporary (e.g. in cmd_edit), so only its contents matter
+    h.update(repr([x for x in linter if x != str(tabfile)]).encode('utf8'))
+    h.update(importlib.metadata.version('mypy').encode('utf8'))
+    h.update(tabfile.read_bytes())
+    for cfg in _mypy_configs(cwd):
+        if cfg.exists():
+            h.update(str(cfg).encode('utf8'))
+            h.update(cfg.read_bytes())
+    # NOTE: only top level files for drontab dir -- drontab might be symlinked into some huge dir (e.g. dotfiles or $HOME)
+    # meh, means changes in nested packages don't invalidate the cache, but seems like a reasonable tradeoff
+    for p in [*sorted(dtab_dir.glob('*.py')), *sorted(_DRON_SRC_DIR.rglob('*.py'))]:
+        h.update(str(p).encode('utf8'))
+        h.update(p.read_bytes())
+    return h.hexdigest()
+
+_LINT_CACHE_MAX_AGE = timedelta(days=30)
+
+
+def _prune_lint_cache() -> None:
+    # each drontab edit results in a new marker, so need to clean up old ones at some point
+    # markers are touched when used, so it's only removing ones that weren't used for a while
+    cutoff = (datetime.now() - _LINT_CACHE_MAX_AGE).timestamp()
+    for p in _LINT_CACHE.iterdir():
+        try:
+            if p.stat().st_mtime < cutoff:
+                p.unlink()
+        except FileNotFoundError:
+            # might be removed concurrently by another dron process
+            pass
+
+
 # eh, implicit convention that only one state will be emitted. oh well
 def lint(tabfile: Path) -> Iterator[Union[Exception, State]]:
     linters = [
@@ -373,7 +455,6 @@ def lint(tabfile: Path) -> Iterator[Union[Exception, State]]:
     ldir = tabfile.parent
     # TODO not sure if should always lint in temporary dir to prevent turds?
 
-    dron_dir = str(Path(__file__).resolve().absolute().parent)
     dtab_dir = drontab_dir()
 
     # meh.
@@ -385,6 +466,12 @@ def lint(tabfile: Path) -> Iterator[Union[Exception, State]]:
     errors = []
     for l in linters:
         scmd = ' '.join(map(shlex.quote, l))
+        # linters are pretty slow, so no need to rerun if nothing changed since they passed last time
+        ok_marker = _LINT_CACHE / _lint_key(l, tabfile=tabfile, dtab_dir=Path(dtab_dir), cwd=ldir)
+        if ok_marker.exists():
+            logger.info(f'Skipping (passed before, nothing changed): {scmd}')
+            ok_marker.touch()  # keep it fresh so it's not pruned
+            continue
         logger.info(f'Running: {scmd}')
         with TemporaryDirectory() as td:
             env = {**os.environ}
@@ -393,6 +480,9 @@ def lint(tabfile: Path) -> Iterator[Union[Exception, State]]:
             r = run(l, cwd=str(ldir), env=env)
         if r.returncode == 0:
             logger.info('OK')
+            ok_marker.parent.mkdir(parents=True, exist_ok=True)
+            ok_marker.touch()
+            _prune_lint_cache()
             continue
         else:
             logger.error(f'FAIL: code: {r.returncode}')
@@ -412,7 +502,7 @@ def lint(tabfile: Path) -> Iterator[Union[Exception, State]]:
         return
 
     try:
-        state = list(make_state(jobs))
+        state = make_state(jobs)
     except Exception as e:
         logger.exception(e)
         yield e
@@ -467,9 +557,13 @@ def jobs():
 
 
 def do_lint(tabfile: Path) -> State:
-    eit, vit = tee(lint(tabfile))
-    errors = [r for r in eit if     isinstance(r, Exception)]
-    values = [r for r in vit if not isinstance(r, Exception)]
+    errors: list[Exception] = []
+    values: list[State] = []
+    for r in lint(tabfile):
+        if isinstance(r, Exception):
+            errors.append(r)
+        else:
+            values.append(r)
     assert len(errors) == 0, errors
     [state] = values
     return state
@@ -488,7 +582,9 @@ def load_jobs(tabfile: Path, ppath: Path) -> Iterator[Job]:
     pp = str(ppath)
     sys.path.insert(0, pp)
     try:
-        exec(tabfile.read_text(), globs)
+        # compiling with the actual filename makes tracebacks point at the tabfile
+        code = compile(tabfile.read_text(), str(tabfile), 'exec')
+        exec(code, globs)
     finally:
         sys.path.remove(pp)  # extremely meh..
 
@@ -10,6 +10,10 @@ import loguru
 from loguru import logger
 
 
+# todo appdirs?
+DRON_CACHE_DIR = Path('~/.cache/dron').expanduser()
+
+
 # TODO can remove this? although might be useful for tests
 VERIFY_UNITS = True
 # TODO ugh. verify tries using already installed unit files so if they were bad, everything would fail
@@ -98,7 +102,7 @@ def escape(command: Command) -> Escaped:
     if isinstance(command, Escaped):
         return command
     elif isinstance(command, Path):
-        return escape([command])
+        return shlex.quote(str(command))
     else:
         return ' '.join(shlex.quote(str(part)) for part in command)
 
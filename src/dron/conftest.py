@@ -16,3 +16,21 @@ def disable_verify_units_if_no_systemd():
         yield
     finally:
         common.VERIFY_UNITS = True
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(tmp_path, monkeypatch):
+    '''
+    Otherwise tests would write into the real ~/.cache/dron, and subsequent runs would skip verification/linting
+    '''
+    from . import systemd
+    import dron
+
+    monkeypatch.setattr(systemd, '_VERIFIED_CACHE', tmp_path / 'cache' / 'verified')
+    monkeypatch.setattr(systemd, '_RESULTS_CACHE', tmp_path / 'cache' / 'journal_results.json')
+    monkeypatch.setattr(dron, '_LINT_CACHE', tmp_path / 'cache' / 'lint')
+    systemd._verified_cache_dir.cache_clear()
+    try:
+        yield
+    finally:
+        systemd._verified_cache_dir.cache_clear()
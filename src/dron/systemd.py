@@ -1,15 +1,17 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
 from functools import lru_cache
-from itertools import groupby
+import hashlib
 import json
 import os
 from pathlib import Path
 import re
 import shlex
-from subprocess import run, PIPE, Popen
-from tempfile import TemporaryDirectory
+import shutil
+from subprocess import run, PIPE, Popen, CalledProcessError, check_output
+from tempfile import NamedTemporaryFile, TemporaryDirectory
 from typing import Optional, Iterator, Any, Sequence
 
 
@@ -22,6 +24,7 @@ from .common import (
     TimerSpec,
     logger,
     escape,
+    DRON_CACHE_DIR,
 )
 from .api import (
     When, OnCalendar,
@@ -39,6 +42,7 @@ def _systemctl(*args: Path | str) -> list[Path | str]:
     return ['systemctl', '--user', *args]
 
 
+@lru_cache(maxsize=1)  # constant, no need to rebuild for every unit
 def managed_header() -> str:
     return f'''
 # {MANAGED_MARKER}
@@ -70,6 +74,10 @@ WantedBy=timers.target
 '''.lstrip()
 
 
+# e.g. '[Unit]After' -> section '[Unit]', key 'After'
+_SECTION_RE = re.compile(r'(\[\w+\])(.*)')
+
+
 # TODO add Restart=always and RestartSec?
 # TODO allow to pass extra args
 def service(
@@ -92,7 +100,7 @@ def service(
         for action in on_failure
     ]
 
-    sections: dict[str, list[str]] = {}
+    sections: dict[str, list[str]] = defaultdict(list)
     sections['[Unit]'] = [f'''
 Description=Service for {unit_name} {MANAGED_MARKER}
 '''.strip()]
@@ -104,7 +112,7 @@ Description=Service for {unit_name} {MANAGED_MARKER}
 
     for k, value in kwargs.items():
         # ideally it would have section name
-        m = re.search(r'(\[\w+\])(.*)', k)
+        m = _SECTION_RE.search(k)
         if m is not None:
             section = m.group(1)
             key = m.group(2)
@@ -112,8 +120,6 @@ Description=Service for {unit_name} {MANAGED_MARKER}
             # 'legacy' behaviour, by default put into [Service]
             section = '[Service]'
             key = k
-        if section not in sections:
-            sections[section] = []
         sections[section].append(f'{key}={value}')
 
     res = managed_header()
@@ -138,32 +144,108 @@ ExecStart=/bin/echo 123
     assert not is_managed(custom)
 
 
+# marker files for units that passed systemd-analyze verify before
+_VERIFIED_CACHE = DRON_CACHE_DIR / 'verified'
+
+
+def _hash(s: str) -> str:
+    return hashlib.blake2b(s.encode('utf8'), digest_size=16).hexdigest()
+
+
+@lru_cache(maxsize=None)  # version is constant, no need to spawn systemd-analyze for each verify_units call
+def _verified_cache_dir() -> Path:
+    # newer systemd might be more strict, so only trust results from the same version
+    version = check_output(['systemd-analyze', '--version'], text=True).splitlines()[0]
+    return _VERIFIED_CACHE / _hash(version)
+
+
+# e.g. 'ExecStart=-/bin/echo 123' -> '/bin/echo 123'
+_EXEC_RE = re.compile(r'^Exec\w+=[-@:+!|]*(.*)$', re.MULTILINE)
+
+
+def _verify_key(unit: Unit, body: Body) -> str:
+    # NOTE: unit type is determined by the file name, so it's part of the key as well
+    parts = [unit, body]
+    # verify also checks that the executables exist, so need to take them into account too
+    # otherwise unit would keep passing after its script is deleted
+    for cmd in _EXEC_RE.findall(body):
+        try:
+            exe = shlex.split(cmd)[0]
+        except (ValueError, IndexError):
+            # meh, let systemd-analyze deal with it
+            continue
+        path = exe if os.path.isabs(exe) else shutil.which(exe)
+        ok = path is not None and os.access(path, os.X_OK)
+        parts.append(f'{exe}:{path}:{ok}')
+    return _hash('\n'.join(parts))
+
+
+def test_verify_key(tmp_path: Path) -> None:
+    script = tmp_path / 'script.sh'
+    script.write_text('#!/bin/sh\n')
+    script.chmod(0o755)
+    body = f'[Service]\nExecStart={script} --arg\n'
+
+    key_ok = _verify_key('whatever.service', body)
+    assert _verify_key('whatever.service', body) == key_ok
+    assert _verify_key('whatever.timer', body) != key_ok
+
+    script.unlink()
+    assert _verify_key('whatever.service', body) != key_ok
+
+
 def verify_units(pre_units: list[tuple[Unit, Body]]) -> None:
+    # systemd-analyze is pretty slow, and normally most units didn't change since the last run
+    # so we only verify units we haven't seen before
+    cache_dir = _verified_cache_dir()
+    hashes = {unit: _verify_key(unit, body) for unit, body in pre_units}
+    # single directory listing instead of stat-ing a marker for each unit
+    seen = set(os.listdir(cache_dir)) if cache_dir.exists() else set()
+    changed = {Path(unit).stem for unit, _ in pre_units if hashes[unit] not in seen}
+    # verifying a timer also loads its service, so need to pass both even if only one of them changed
+    to_verify = [(unit, body) for unit, body in pre_units if Path(unit).stem in changed]
+    if len(to_verify) == 0:
+        return
+
+    _verify_units(to_verify)  # throws if failed
+
+    if not cache_dir.exists():
+        # first run after systemd upgrade -- markers for other versions are never going to be used again
+        if _VERIFIED_CACHE.exists():
+            for d in _VERIFIED_CACHE.iterdir():
+                if d != cache_dir:
+                    shutil.rmtree(d, ignore_errors=True)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+    for unit, _ in to_verify:
+        (cache_dir / hashes[unit]).touch()
+
+
+def _verify_units(pre_units: list[tuple[Unit, Body]]) -> None:
     # ugh. systemd-analyze takes about 0.2 seconds for each unit for some reason
     # oddly enough, in bulk it works just as fast :thinking_face:
     # also doesn't work in parallel (i.e. parallel processes)
     # that ends up with some weird errors trying to connect to socket
     with TemporaryDirectory() as _tdir:
         tdir = Path(_tdir)
+        unit_files = []
         for unit, body in pre_units:
-            (tdir / unit).write_text(body)
-        res = run(['systemd-analyze', '--user', 'verify', *tdir.glob('*')], stdout=PIPE, stderr=PIPE)
+            unit_file = tdir / unit
+            unit_file.write_text(body)
+            unit_files.append(unit_file)
+        res = run(['systemd-analyze', '--user', 'verify', *unit_files], stdout=PIPE, stderr=PIPE)
         # ugh. apparently even exit code 0 doesn't guarantee correct output??
         out = res.stdout.decode('utf8')
-        err = res.stderr.decode('utf8')
+        # strip temporary dir, so it's clear which unit the error is about
+        err = res.stderr.decode('utf8').replace(f'{tdir}/', '')
         assert out == '', out
         if err == '':
             return
 
-        err_lines = err.splitlines(keepends=True)
-        unique_err_lines = []
         # uhh.. in bulk mode it spams with tons of 'Cannot add dependency job' for some reason
         # I guess it kinda treats everything as dependent on each other??
         # https://github.com/systemd/systemd/blob/b692ad36b99909453cf4f975a346e41d6afc68a0/src/core/transaction.c#L978
-        for l in err_lines:
-            if l not in unique_err_lines:
-                unique_err_lines.append(l)
-        err_lines = unique_err_lines
+        # dict preserves insertion order, so this dedups while keeping the original order
+        err_lines = list(dict.fromkeys(err.splitlines(keepends=True)))
 
         if len(err_lines) == 0:
             return
@@ -232,37 +314,57 @@ class BusManager:
 
     def properties(self, u: Unit):
         service_unit = self.manager.GetUnit(u)
-        service_proxy = self.bus.get_object(_sd(''), str(service_unit))
+        return self.properties_at(service_unit)
+
+    def properties_at(self, unit_path):
+        # we only ever call Get/GetAll, so no need for an extra Introspect roundtrip for each object
+        service_proxy = self.bus.get_object(_sd(''), str(unit_path), introspect=False)
         return self.Interface(service_proxy, dbus_interface='org.freedesktop.DBus.Properties')
 
     @staticmethod  # meh
     def prop(obj, schema: str, name: str):
         return obj.Get(_sd(schema), name)
 
+    @staticmethod  # meh
+    def all_props(obj, schema: str):
+        # single roundtrip, much faster than multiple Get calls
+        return obj.GetAll(_sd(schema))
+
     @classmethod
     def exec_start(cls, props) -> Sequence[str]:
-        dbus_exec_start = cls.prop(props, '.Service', 'ExecStart')
+        return cls.parse_exec_start(cls.prop(props, '.Service', 'ExecStart'))
+
+    @staticmethod
+    def parse_exec_start(dbus_exec_start) -> Sequence[str]:
         return [str(x) for x in dbus_exec_start[0][1]]
 
 
-def systemd_state(*, with_body: bool) -> State:
+def systemd_state(*, with_body: bool, with_unit_file: bool=True) -> State:
+    # with_unit_file=False saves a dbus call per unit, but then only unit_file.name is meaningful
+    assert with_unit_file or not with_body  # need the unit file to read the body
     bus = BusManager()
-    states = bus.manager.ListUnits()  # ok nice, it's basically instant
+    # dron only ever creates services and timers, so no need to get devices/mounts/slices etc. over dbus
+    states = bus.manager.ListUnitsByPatterns([], ['*.service', '*.timer'])  # ok nice, it's basically instant
 
     for state in states:
         name  = state[0]
         descr = state[1]
+        path  = state[6]
         if not is_managed(descr):
             continue
 
+        # NOTE: unit object path is already in the listing, so no need for a GetUnit roundtrip
         # todo annoying, this call still takes some time... but whatever ok
-        props = bus.properties(name)
+        props = bus.properties_at(path)
 
         # useful for debugging, can also use .Service if it's not a timer
         # all_properties = props.GetAll(_sd('.Unit'))
 
         # stale = int(bus.prop(props, '.Unit', 'NeedDaemonReload')) == 1
-        unit_file = Path(str(bus.prop(props, '.Unit', 'FragmentPath'))).resolve()
+        if with_unit_file:
+            unit_file = Path(str(bus.prop(props, '.Unit', 'FragmentPath'))).resolve()
+        else:
+            unit_file = Path(name)
         body = unit_file.read_text() if with_body else None
         cmdline: Optional[Sequence[str]]
         if '.timer' in name: # meh
@@ -296,29 +398,67 @@ def skip_if_no_systemd() -> None:
         pytest.skip(f'No systemd: {reason}')
 
 
+# apparently systemd uses max uint64 for 'infinity' timestamps
+_USEC_INFINITY = 2 ** 64 - 1
+_UTCMAX = datetime.max.replace(tzinfo=timezone.utc)
+
+
 class MonitorHelper:
     def __init__(self) -> None:
-        import pytz
-        self.utc = pytz.utc
-        self.utcmax = self.utc.localize(datetime.max)
+        self.utc = timezone.utc
 
     def from_usec(self, usec) -> datetime:
         u = int(usec)
-        if u == 2 ** 64 - 1: # apparently systemd uses max uint64
-            # happens if the job is running ATM?
-            return self.utcmax
-        else:
-            return self.utc.localize(datetime.utcfromtimestamp(u / 10 ** 6))
+        # infinity happens if the job is running ATM?
+        return _UTCMAX if u == _USEC_INFINITY else datetime.fromtimestamp(u / 10 ** 6, tz=timezone.utc)
 
     @property
-    @lru_cache
     def local_tz(self):
-        # TODO warning if tzlocal isn't installed?
-        try:
-            from tzlocal import get_localzone
-            return get_localzone()
-        except:
-            return self.utc
+        return _get_local_tz()
+
+
+@lru_cache(maxsize=None)  # cached for the whole process, and only resolved if actually needed
+def _get_local_tz():
+    # TODO warning if tzlocal isn't installed?
+    try:
+        from tzlocal import get_localzone
+        return get_localzone()
+    except:
+        return timezone.utc
+
+
+_MINUTE = 60
+_HOUR   = 60 * _MINUTE
+_DAY    = 24 * _HOUR
+
+
+# TODO maybe format seconds prettier. dunno
+def fmt_delta(d: timedelta) -> str:
+    # format to reduce constant countdown...
+    ad = abs(d)
+    # get rid of microseconds. plain int math is quite a bit faster than timedelta arithmetic
+    total = ad.days * _DAY + ad.seconds
+
+    if total > _DAY:
+        days, rem = divmod(total, _DAY)
+        return f'>{days}d {rem // _HOUR}h'
+
+    hours, rem = divmod(total, _HOUR)
+    mins, secs = divmod(rem, _MINUTE)
+    if total > _MINUTE:
+        return f'>{hours:02}:{mins:02}:00'
+    else:
+        # show exact
+        return f'{hours:02}:{mins:02}:{secs:02}'
+
+
+def test_fmt_delta() -> None:
+    assert fmt_delta(timedelta(seconds=5, microseconds=123)) == '00:00:05'
+    assert fmt_delta(-timedelta(seconds=5)) == '00:00:05'
+    assert fmt_delta(timedelta(minutes=5, seconds=30)) == '>00:05:00'
+    assert fmt_delta(timedelta(hours=13, minutes=5, seconds=30)) == '>13:05:00'
+    assert fmt_delta(timedelta(days=3, hours=4, minutes=5)) == '>3d 4h'
+    assert fmt_delta(timedelta(days=10, hours=12)) == '>10d 12h'
 
 
 from .common import MonParams
@@ -330,98 +470,70 @@ def _cmd_monitor(managed: State, *, params: MonParams):
     mon = MonitorHelper()
 
     UTCNOW = datetime.now(tz=mon.utc)
+    # NOTE: doing all the delta math on raw usec ints, it's cheaper than datetime arithmetic
+    NOW_USEC = int(UTCNOW.timestamp() * 10 ** 6)
 
     bus = BusManager()
 
     from .common import MonitorEntry, print_monitor
     entries: list[MonitorEntry] = []
-    names = sorted(s.unit_file.name for s in managed)
-    uname = lambda full: full.split('.')[0]
-    for k, _gr in groupby(names, key=uname):
-        gr = list(_gr)
+    # unit name -> {'service': ..., 'timer': ...}
+    groups: dict[str, dict[str, str]] = defaultdict(dict)
+    for s in managed:
+        name = s.unit_file.name
+        stem, _, ext = name.rpartition('.')
+        groups[stem][ext] = name
+
+    units_results = _all_units_results({gr['service'] for gr in groups.values()}) if params.with_success_rate else None
+    for k, gr in groups.items():
+        assert gr.keys() <= {'service', 'timer'}, gr
+        service: str = gr['service']
         # if timer is None, guess that means the job is always running?
-        timer: Optional[str]
-        service: str
-        if len(gr) == 2:
-            [service, timer] = gr
-        else:
-            assert len(gr) == 1, gr
-            [service] = gr
-            timer = None
+        timer: Optional[str] = gr.get('timer')
 
         if timer is not None:
-            props = bus.properties(timer)
-            cal   = bus.prop(props, '.Timer', 'TimersCalendar')
-            last  = bus.prop(props, '.Timer', 'LastTriggerUSec')
-            next_ = bus.prop(props, '.Timer', 'NextElapseUSecRealtime')
+            timer_props = bus.all_props(bus.properties(timer), '.Timer')
+            cal       = timer_props['TimersCalendar']
+            last_usec = int(timer_props['LastTriggerUSec'])
+            next_usec = int(timer_props['NextElapseUSecRealtime'])
 
             schedule = cal[0][1]  # TODO is there a more reliable way to retrieve it??
             # todo not sure if last is really that useful..
 
-            last_dt = mon.from_usec(last)
-            next_dt = mon.from_usec(next_)
+            next_dt = mon.from_usec(next_usec)
             nexts = next_dt.astimezone(mon.local_tz).replace(tzinfo=None, microsecond=0).isoformat()
 
-            if next_dt == datetime.max:
+            if next_usec == _USEC_INFINITY:
                 left_delta = timedelta(0)
             else:
-                left_delta   = next_dt - UTCNOW
+                left_delta = timedelta(microseconds=next_usec - NOW_USEC)
         else:
             left_delta = timedelta(0) # TODO
-            last_dt = UTCNOW
+            last_usec = NOW_USEC
             nexts = 'n/a'
             schedule = 'always'
 
-        # TODO maybe format seconds prettier. dunno
-        def fmt_delta(d: timedelta) -> str:
-            # format to reduce constant countdown...
-            ad = abs(d)
-            # get rid of microseconds
-            ad = ad - timedelta(microseconds=ad.microseconds)
-
-            day    = timedelta(days=1)
-            hour   = timedelta(hours=1)
-            minute = timedelta(minutes=1)
-            gt = False
-            if ad > day:
-                full_days  = ad // day
-                hours = (ad % day) // hour
-                ads = f'{full_days}d {hours}h'
-                gt = True
-            elif ad > minute:
-                full_mins  = ad // minute
-                ad = timedelta(minutes=full_mins)
-                ads = str(ad)
-                gt = True
-            else:
-                # show exact
-                ads = str(ad)
-            if len(ads) == 7:
-                ads = '0' + ads # meh. fix missing leading zero in hours..
-            ads = ('>' if gt else '') + ads
-            return ads
-
-
         left   = f'{str(fmt_delta(left_delta)):<9}'
-        if last_dt.timestamp() == 0:
+        if last_usec == 0:
             ago = 'never' # TODO yellow?
         else:
-            passed_delta = UTCNOW - last_dt
+            passed_delta = timedelta(microseconds=NOW_USEC - last_usec)
             ago = str(fmt_delta(passed_delta))
         # TODO instead of hacking microsecond, use 'NOW' or something?
 
-        props = bus.properties(service)
+        service_props = bus.all_props(bus.properties(service), '.Service')
         # TODO some summary too? e.g. how often in failed
         # TODO make defensive?
-        result = bus.prop(props, '.Service', 'Result')
-        exec_start = BusManager.exec_start(props)
-        assert exec_start is not None, service  # not None for services
-        command = ' '.join(map(shlex.quote, exec_start)) if params.with_command else None
-        _pid: Optional[int] = int(bus.prop(props, '.Service', 'MainPID'))
+        result = service_props['Result']
+        command: Optional[str] = None
+        if params.with_command:
+            exec_start = BusManager.parse_exec_start(service_props['ExecStart'])
+            command = ' '.join(map(shlex.quote, exec_start))
+        _pid: Optional[int] = int(service_props['MainPID'])
         pid  = None if _pid == 0 else str(_pid)
 
-        if params.with_success_rate:
-            rate = _unit_success_rate(service)
+        if units_results is not None:
+            rate = _success_rate(service, units_results[service])
             rates = f' {rate:.2f}'
         else:
             rates = ''
@@ -442,38 +554,48 @@ def _cmd_monitor(managed: State, *, params: MonParams):
     print_monitor(entries)
 
 
+try:
+    # optional, but a few times faster for parsing lots of journal records
+    # unused-ignore because orjson might not be installed (but this code is still running mypy on CI)
+    from orjson import loads as json_loads  # type: ignore[import-not-found,unused-ignore]
+except ImportError:
+    from json import loads as json_loads  # type: ignore[assignment,unused-ignore]
+
+
 Json = dict[str, Any]
-def _unit_logs(unit: Unit) -> Iterator[Json]:
+def _journal_logs(*args: str) -> Iterator[Json]:
     # TODO so do I need to parse logs to get failure stats? perhaps json would be more reliable
-    cmd = f'journalctl --user -u {unit} -o json -t systemd --output-fields UNIT_RESULT,JOB_TYPE,MESSAGE'
-    with Popen(cmd.split(), stdout=PIPE) as po:
+    cmd = ['journalctl', '--user', *args, '-o', 'json', '-t', 'systemd', '--output-fields', 'USER_UNIT,UNIT_RESULT,JOB_TYPE,MESSAGE']
+    with Popen(cmd, stdout=PIPE) as po:
         stdout = po.stdout; assert stdout is not None
         for line in stdout:
-            j = json.loads(line.decode('utf8'))
+            j = json_loads(line)  # both can parse utf8 bytes directly, no need to decode first
             # apparently, successful runs aren't getting logged? not sure why
             jt = j.get('JOB_TYPE')
             ur = j.get('UNIT_RESULT')
             # not sure about this..
             yield j
+    # otherwise if journalctl fails (e.g. rejects the cursor), we'd silently get no results
+    if po.returncode != 0:
+        raise CalledProcessError(po.returncode, cmd)
 
 
-def _unit_success_rate(unit: Unit) -> float:
-    started = 0
-    failed  = 0
-    # TODO not sure how much time it takes to query all journals?
-    for j in _unit_logs(unit):
-        jt = j.get('JOB_TYPE')
-        ur = j.get('UNIT_RESULT')
-        if jt is not None:
-            assert ur is None
-            started += 1
-        elif ur is not None:
-            assert jt is None
-            failed += 1
-        else:
-            # TODO eh? sometimes jobs also report Succeeded status
-            # e.g. syncthing-paranoid
-            pass
+def _unit_logs(unit: Unit) -> Iterator[Json]:
+    return _journal_logs('-u', unit)
+
+
+# (has JOB_TYPE, has UNIT_RESULT)
+ResultKey = tuple[bool, bool]
+def _result_key(j: Json) -> ResultKey:
+    return (j.get('JOB_TYPE') is not None, j.get('UNIT_RESULT') is not None)
+
+
+def _success_rate(unit: Unit, c: Counter[ResultKey]) -> float:
+    # TODO eh? sometimes jobs also report Succeeded status (i.e. neither is present), ignoring these
+    # e.g. syncthing-paranoid
+    assert c[(True, True)] == 0, unit
+    started = c[(True, False)]
+    failed  = c[(False, True)]
     if started == 0:
         assert failed == 0, unit
         return 1.0
@@ -481,6 +603,75 @@ def _unit_success_rate(unit: Unit) -> float:
     return success / started
 
 
+# results tallied so far along with the journal cursor they were computed up to
+_RESULTS_CACHE = DRON_CACHE_DIR / 'journal_results.json'
+
+
+def _load_results_cache() -> tuple[Optional[str], dict[Unit, Counter[ResultKey]]]:
+    if not _RESULTS_CACHE.exists():
+        return (None, {})
+    try:
+        cached = json.loads(_RESULTS_CACHE.read_text())
+        cursor = cached['cursor']
+        results = {
+            unit: Counter({(jt, ur): count for jt, ur, count in counts})
+            for unit, counts in cached['results'].items()
+        }
+    except Exception as e:
+        # otherwise monitor would keep crashing until the file is removed manually
+        logger.error(f'failed to load {_RESULTS_CACHE}, rescanning journal from scratch')
+        logger.exception(e)
+        return (None, {})
+    return (cursor, results)
+
+
+def _tally_results(results: dict[Unit, Counter[ResultKey]], cursor: Optional[str]) -> Optional[str]:
+    after_cursor = [] if cursor is None else ['--after-cursor', cursor]
+    for j in _journal_logs(*after_cursor):
+        cursor = j['__CURSOR']
+        unit = j.get('USER_UNIT')
+        if unit is None:
+            continue
+        c = results.get(unit)
+        if c is None:
+            # not tracked, e.g. not managed by dron
+            # otherwise we'd keep tallies for all sorts of transient units and the cache would grow indefinitely
+            continue
+        c[_result_key(j)] += 1
+    return cursor
+
+
+def _all_units_results(units: set[Unit]) -> dict[Unit, Counter[ResultKey]]:
+    # scanning the journal once is way faster than running journalctl for each unit separately
+    # on top of that we only scan entries after the cached cursor (monitor is normally running under watch)
+    cursor, cached = _load_results_cache()
+    if not units <= cached.keys():
+        # some units weren't tracked before, so need to rescan to get their full history
+        cursor, cached = None, {}
+    results = {unit: cached.get(unit, Counter()) for unit in units}
+    try:
+        cursor = _tally_results(results, cursor)
+    except CalledProcessError as e:
+        if cursor is None:
+            raise
+        # e.g. if journal was vacuumed and cursor isn't valid anymore
+        logger.error('failed to read journal after cached cursor, rescanning journal from scratch')
+        logger.exception(e)
+        results = {unit: Counter() for unit in units}
+        cursor = _tally_results(results, None)
+
+    to_cache = {
+        'cursor': cursor,
+        'results': {unit: [[*k, count] for k, count in c.items()] for unit, c in results.items()},
+    }
+    _RESULTS_CACHE.parent.mkdir(parents=True, exist_ok=True)
+    # unique tmp file + atomic replace, in case multiple monitors are running
+    with NamedTemporaryFile('w', dir=_RESULTS_CACHE.parent, prefix=_RESULTS_CACHE.name, delete=False) as f:
+        json.dump(to_cache, f)
+    os.replace(f.name, _RESULTS_CACHE)
+    return results
+
+
 def cmd_past(unit: Unit) -> None:
     mon = MonitorHelper()
     for j in _unit_logs(unit):
@@ -493,7 +684,7 @@ def cmd_run(*, unit: Unit, exec: bool) -> None:
     assert exec  # support without exec later
     # TODO we might have called it before via managed_units.. maybe need to cache
     states = []
-    for s in systemd_state(with_body=False):
+    for s in systemd_state(with_body=False, with_unit_file=False):
         # meh
         unit_name = s.unit_file.name
         if unit_name.endswith('.timer'):